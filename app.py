@@ -18,7 +18,11 @@ Dependencies:
 
 from fastapi import FastAPI, Request
 from pydantic import BaseModel
-import boto3, os, urllib.parse, json
+from typing import Optional
+import os, io, urllib.parse, json, base64, asyncio, shutil
+from functools import partial
+import cv2
+import numpy as np
 from datetime import datetime
 from decimal import Decimal
 from collections import Counter
@@ -26,14 +30,40 @@ from collections import Counter
 from lamda.inference.audio_inference import run_audio_detection
 from lamda.inference.image_inference import detect_birds_in_image
 from lamda.inference.video_inference import run_video_detection
+from lamda.inference.yolo_singleton import get_yolo
 from lamda.utils.db_writer import upload_to_dynamodb
+from lamda.utils.aws_clients import get_s3, TRANSFER_CONFIG
+from audio_detection.model_runner import BirdNetRunner
 
 app = FastAPI()
-s3 = boto3.client("s3")
+# Shared client whose 50-connection pool covers the 16 transfer threads
+s3 = get_s3()
 
 TEMP_FILE_PATH = "/tmp/input_media"
+# Video still needs a real path for cv2.VideoCapture; prefer tmpfs (RAM) when it has room
+SHM_DIR = "/dev/shm"
+SHM_FILE_PATH = os.path.join(SHM_DIR, "input_media")
 BUCKET_NAME = os.getenv("BUCKET_NAME", "birdtag-data-bucket")
 
+# File extension -> media type, built once
+EXT_TO_TYPE = {
+    ext: media_type
+    for media_type, exts in (
+        ("audio", ("mp3", "wav", "flac")),
+        ("image", ("jpg", "jpeg", "png")),
+        ("video", ("mp4", "mov", "avi")),
+    )
+    for ext in exts
+}
+
+# Media type -> inference handler taking the fetched media (bytes, or a path for video)
+HANDLERS = {
+    "audio": lambda media: run_audio_detection(io.BytesIO(media)),
+    "image": lambda media: detect_birds_in_image(
+        cv2.imdecode(np.frombuffer(media, np.uint8), cv2.IMREAD_COLOR)
+    ),
+    "video": run_video_detection,
+}
 
 class S3Event(BaseModel):
     """
@@ -42,9 +72,12 @@ class S3Event(BaseModel):
     Attributes:
         bucket (str): S3 bucket name.
         key (str): S3 key of the uploaded media file.
+        payload (str, optional): Base64-encoded media bytes. When provided, the
+            S3 download is skipped (useful for small files under ~6MB).
     """
     bucket: str
     key: str
+    payload: Optional[str] = None
 
 
 def download_from_s3(bucket, key, local_path=TEMP_FILE_PATH):
@@ -59,17 +92,97 @@ def download_from_s3(bucket, key, local_path=TEMP_FILE_PATH):
     Returns:
         str: Local file path.
     """
-    s3.download_file(bucket, key, local_path)
+    s3.download_file(bucket, key, local_path, Config=TRANSFER_CONFIG)
     print(f"[INFO] Downloaded file to {local_path}")
     return local_path
 
 
+def video_file_path(size):
+    """
+    Pick where to write a video: tmpfs if it exists and has room, else /tmp.
+
+    Docker's default /dev/shm is only 64MB, so larger videos fall back to disk.
+
+    Parameters:
+        size (int): Size of the video in bytes.
+
+    Returns:
+        str: Local file path to write the video to.
+    """
+    if os.path.isdir(SHM_DIR) and size < shutil.disk_usage(SHM_DIR).free:
+        return SHM_FILE_PATH
+    return TEMP_FILE_PATH
+
+
+def download_video(bucket, key):
+    """
+    Download a video from S3 to tmpfs when it fits, otherwise to /tmp.
+
+    Parameters:
+        bucket (str): S3 bucket name.
+        key (str): Object key.
+
+    Returns:
+        str: Local file path.
+    """
+    size = s3.head_object(Bucket=bucket, Key=key)["ContentLength"]
+    return download_from_s3(bucket, key, video_file_path(size))
+
+
+def download_to_memory(bucket, key):
+    """
+    Download a file from S3 straight into memory, skipping the /tmp round-trip.
+
+    Parameters:
+        bucket (str): S3 bucket name.
+        key (str): Object key.
+
+    Returns:
+        bytes: Raw object contents.
+    """
+    buffer = io.BytesIO()
+    s3.download_fileobj(bucket, key, buffer, Config=TRANSFER_CONFIG)
+    print(f"[INFO] Downloaded {buffer.tell()} bytes into memory")
+    return buffer.getvalue()
+
+
+def write_inline_payload(payload, local_path=TEMP_FILE_PATH):
+    """
+    Decode base64 media sent inline with the request and write it locally.
+
+    Parameters:
+        payload (str): Base64-encoded media bytes.
+        local_path (str): Where to save the file locally.
+
+    Returns:
+        str: Local file path.
+    """
+    with open(local_path, "wb") as f:
+        f.write(base64.b64decode(payload))
+    print(f"[INFO] Wrote inline payload to {local_path}")
+    return local_path
+
+
+def warm_model(media_type):
+    """
+    Load the model for a media type so the first inference call doesn't pay for it.
+
+    Parameters:
+        media_type (str): "audio", "image", or "video".
+    """
+    if media_type == "audio":
+        BirdNetRunner.load_model(BirdNetRunner.default_model_path())
+    else:
+        get_yolo()
+
+
 def save_results(results):
     """
-    Save inference results to DynamoDB. Handles both audio and image/video formats.
+    Save inference results to DynamoDB.
 
     Parameters:
-        results (dict): Contains source_path, media_type, and results from inference.
+        results (dict): Contains source_path, media_type, and results from inference
+            (a list of dicts with "label" and "confidence" for every media type).
     """
     try:
         timestamp = datetime.utcnow().isoformat()
@@ -77,32 +190,23 @@ def save_results(results):
         media_type = results["media_type"]
         entries = results["results"]
 
-        if media_type == "audio":
-            top_result = max(entries, key=lambda x: x["confidence"])
-            item = {
-                "source_path": {"S": source_path},
-                "timestamp": {"S": timestamp},
-                "file_type": {"S": "audio"},
-                "file_url": {"S": f"https://{BUCKET_NAME}.s3.amazonaws.com/{source_path}"},
-                "label": {"S": top_result["label"]},
-                "confidence": {"N": f"{top_result['confidence']:.3f}"}
-            }
-            upload_to_dynamodb([item])
+        file_url = f"https://{BUCKET_NAME}.s3.amazonaws.com/{source_path}"
 
-        else:
-            for result in entries:
-                label, confidence = result.split()
-                label = label.strip()
-                confidence = float(confidence.strip('%')) / 100
-                item = {
-                    "source_path": {"S": source_path},
-                    "timestamp": {"S": timestamp},
-                    "file_type": {"S": media_type},
-                    "file_url": {"S": f"https://{BUCKET_NAME}.s3.amazonaws.com/{source_path}"},
-                    "label": {"S": label},
-                    "confidence": {"N": f"{confidence:.3f}"}
-                }
-                upload_to_dynamodb([item])
+        # Audio stores only its top prediction; image/video store every detection
+        if media_type == "audio":
+            entries = [max(entries, key=lambda x: x["confidence"])]
+
+        items = [{
+            "source_path": {"S": source_path},
+            "timestamp": {"S": timestamp},
+            "file_type": {"S": media_type},
+            "file_url": {"S": file_url},
+            "label": {"S": entry["label"]},
+            "confidence": {"N": f"{entry['confidence']:.3f}"}
+        } for entry in entries]
+
+        # Single batched upload instead of one round-trip per detection
+        upload_to_dynamodb(items)
     except Exception as e:
         print(f"[ERROR] Failed to save results: {e}")
         raise
@@ -141,27 +245,38 @@ async def infer(event: S3Event):
     print(f"[INFO] Received S3 file: {key} in bucket: {bucket}")
 
     file_ext = key.lower().split(".")[-1]
-    media_type = (
-        "audio" if file_ext in ["mp3", "wav", "flac"]
-        else "image" if file_ext in ["jpg", "jpeg", "png"]
-        else "video" if file_ext in ["mp4", "mov", "avi"]
-        else "unknown"
-    )
+    media_type = EXT_TO_TYPE.get(file_ext, "unknown")
 
     if media_type == "unknown":
         return {"error": "Unsupported media type"}
 
-    local_file = download_from_s3(bucket, key)
     print(f"[INFO] Detected media type: {media_type}")
 
-    if media_type == "audio":
-        results = run_audio_detection(local_file)
-    elif media_type == "image":
-        results = detect_birds_in_image(local_file)
-    elif media_type == "video":
-        results = run_video_detection(local_file)
+    # OpenCV VideoCapture needs a path, so video is the only file-backed route
+    if media_type == "video":
+        if event.payload:
+            # Decoded base64 is 3/4 of the encoded length
+            local_path = video_file_path(len(event.payload) * 3 // 4)
+            fetch = partial(write_inline_payload, event.payload, local_path)
+        else:
+            fetch = partial(download_video, bucket, key)
+    elif event.payload:
+        fetch = partial(base64.b64decode, event.payload)
     else:
-        raise ValueError("Unsupported media type")
+        fetch = partial(download_to_memory, bucket, key)
+
+    # Overlap the (I/O-bound) media fetch with model loading on a cold start
+    media, _ = await asyncio.gather(
+        asyncio.to_thread(fetch),
+        asyncio.to_thread(warm_model, media_type),
+    )
+
+    try:
+        results = HANDLERS[media_type](media)
+    finally:
+        # Video is the only file-backed route; drop it so tmpfs (RAM) isn't held until the next request
+        if media_type == "video" and os.path.exists(media):
+            os.remove(media)
 
     final_result = {
         "media_type": media_type,
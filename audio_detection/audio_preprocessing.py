@@ -3,26 +3,79 @@
 Prepares audio input for BirdNET's TensorFlow Lite model by loading, resampling, 
 padding/trimming, and reshaping it to the expected format.
 
-This script disables Numba's cache to prevent permission-related warnings or slowdowns 
-when running inside constrained environments like AWS Lambda.
+Audio is decoded with `soundfile` and resampled with `scipy.signal.resample_poly`,
+which avoids librosa's heavy import and Numba JIT cost on cold start.
 
 Functions:
-- preprocess_audio(): Loads and normalizes audio to the model’s input shape.
+- load_audio(): Decodes audio to mono float32 at the target sample rate.
+- preprocess_audio(): Loads and normalizes audio to the model’s input shape. Results for
+  on-disk files are memoized by (path, mtime, size) so warm repeat calls skip decoding.
 - process_audio_file: Alias for preprocess_audio to maintain consistent naming elsewhere.
 """
 
+import math
 import os
-os.environ["NUMBA_DISABLE_CACHE"] = "1"
-
-import librosa
+from functools import lru_cache
 import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+
+def load_audio(audio_path, target_sr: int = 48000, duration: float = None):
+    """
+    Decode an audio file to a mono float32 signal at the target sample rate.
+
+    Parameters:
+        audio_path (str or file-like): Path to the audio file, or an in-memory buffer.
+        target_sr (int): Target sample rate (default: 48000 Hz).
+        duration (float, optional): Only decode this many seconds from the start.
+
+    Returns:
+        np.ndarray: 1D float32 array of samples at `target_sr`.
+    """
+    with sf.SoundFile(audio_path) as f:
+        sr = f.samplerate
+        frames = -1 if duration is None else int(math.ceil(duration * sr))
+        y = f.read(frames=frames, dtype="float32", always_2d=False)
+
+    # Downmix to mono
+    if y.ndim > 1:
+        y = y.mean(axis=1)
 
-def preprocess_audio(audio_path: str, target_sr: int = 48000, target_samples: int = 144000):
+    # Polyphase resampling only when the native rate differs
+    if sr != target_sr:
+        g = math.gcd(sr, target_sr)
+        y = resample_poly(y, target_sr // g, sr // g)
+
+    return y.astype(np.float32, copy=False)
+
+
+def _fit_to_model_input(audio_path, target_sr, target_samples):
+    """Decode audio and pad/trim it to a (1, target_samples) float32 array."""
+    # Only decode as much audio as the model will consume
+    y = load_audio(audio_path, target_sr, duration=target_samples / target_sr)
+
+    # Single pass into a zero-filled buffer: trims long audio and pads short audio
+    out = np.zeros((1, target_samples), dtype=np.float32)
+    n = min(len(y), target_samples)
+    out[0, :n] = y[:n]
+    return out
+
+
+@lru_cache(maxsize=8)
+def _preprocess_cached(audio_path, mtime_ns, size, target_sr, target_samples):
+    """Memoized variant keyed on file identity; the result is read-only as it is shared."""
+    y = _fit_to_model_input(audio_path, target_sr, target_samples)
+    y.flags.writeable = False
+    return y
+
+
+def preprocess_audio(audio_path, target_sr: int = 48000, target_samples: int = 144000):
     """
     Load and preprocess an audio file for input into the BirdNET TFLite model.
 
     Parameters:
-        audio_path (str): Path to the input audio file.
+        audio_path (str or file-like): Path to the input audio file, or an in-memory buffer.
         target_sr (int): Target sample rate for resampling (default: 48000 Hz).
         target_samples (int): Total number of samples expected (default: 144000, i.e., 3 seconds at 48kHz).
 
@@ -30,16 +83,10 @@ def preprocess_audio(audio_path: str, target_sr: int = 48000, target_samples: in
         np.ndarray: A 2D numpy array of shape (1, target_samples), dtype float32,
                     ready for TFLite model inference.
     """
-    y, sr = librosa.load(audio_path, sr=target_sr, mono=True)
-
-    # Adjust audio length to match expected input shape
-    if len(y) > target_samples:
-        y = y[:target_samples]
-    elif len(y) < target_samples:
-        y = np.pad(y, (0, target_samples - len(y)), mode='constant')
-
-    y = y.astype(np.float32)
-    return y.reshape(1, target_samples)
+    if isinstance(audio_path, str):
+        stat = os.stat(audio_path)
+        return _preprocess_cached(audio_path, stat.st_mtime_ns, stat.st_size, target_sr, target_samples)
+    return _fit_to_model_input(audio_path, target_sr, target_samples)
 
 # Alias for easier import elsewhere in the codebase
 process_audio_file = preprocess_audio
@@ -1,64 +1,130 @@
 """
 model_runner.py
 
-Performs audio inference using the BirdNET TFLite model.
+Performs audio inference using the BirdNET model.
 
 This module defines the BirdNetRunner class which handles:
-1. Loading the TFLite model and labels only once (singleton-style).
-2. Preprocessing and reshaping audio to expected model format.
-3. Running inference and extracting top predictions with softmax scores.
-
-The model expects mono audio sampled at 32kHz for a duration of 4.5 seconds
-(144000 samples). The output is softmax-normalized and sorted by confidence.
-
-Environment:
-- NUMBA_DISABLE_CACHE is set to prevent Numba cache issues in constrained runtimes.
+1. Loading the model and labels only once (singleton-style). An ONNX export is
+   preferred and run with ONNX Runtime (CUDA EP when available, else CPU); the
+   bundled TFLite model is used as a fallback, importing TensorFlow only then.
+2. Preprocessing audio via `audio_preprocessing.process_audio_file`.
+3. Running inference and extracting top predictions with softmax scores
+   (top-k via np.argpartition, softmax applied only to the selected logits).
+
+The model (BirdNET V2.4) expects mono audio sampled at 48kHz for a duration of
+3 seconds (144000 samples). The output is softmax-normalized and sorted by confidence.
+
+To produce the ONNX model once, offline:
+    python -m tf2onnx.convert --tflite BirdNET_GLOBAL_6K_V2.4_Model_FP16.tflite \
+        --output BirdNET_GLOBAL_6K_V2.4_Model.onnx --opset 17
 """
 
 import os
-import tensorflow as tf
+import logging
+import threading
 import numpy as np
-import librosa
-from scipy.special import softmax
+from audio_detection.audio_preprocessing import process_audio_file
 
-# Set global constants for audio format
-SAMPLE_RATE = 32000
-DURATION = 4.5
-NUM_SAMPLES = int(SAMPLE_RATE * DURATION)
+logger = logging.getLogger(__name__)
 
-# Disable numba caching for environments like AWS Lambda
-os.environ["NUMBA_DISABLE_CACHE"] = "1"
+MODEL_DIR = "audio_detection/model_files"
+ONNX_MODEL_PATH = os.path.join(MODEL_DIR, "BirdNET_GLOBAL_6K_V2.4_Model.onnx")
+TFLITE_MODEL_PATH = os.path.join(MODEL_DIR, "BirdNET_GLOBAL_6K_V2.4_Model_FP16.tflite")
+LABELS_PATH = os.path.join(MODEL_DIR, "BirdNET_GLOBAL_6K_V2.4_Labels.txt")
 
 class BirdNetRunner:
     """
-    A singleton-style runner class for performing inference with BirdNET TFLite models.
+    A singleton-style runner class for performing inference with BirdNET models.
 
     Methods:
-        - load_model(): Loads and initializes the TFLite interpreter.
+        - default_model_path(): Returns the ONNX model if present, else the TFLite model.
+        - load_model(): Loads an ONNX Runtime session or TFLite interpreter.
         - load_labels(): Loads and caches label list from file.
         - run_audio_inference(): Performs full inference on an audio file.
     """
     _model = None
     _labels = None
+    # Guards the lazy loads so concurrent first callers share one model/label instance
+    _model_lock = threading.Lock()
+
+    @classmethod
+    def default_model_path(cls):
+        """
+        Return the preferred model file: the ONNX export if present, else the TFLite model.
+
+        Returns:
+            str: Path to the model file.
+        """
+        return ONNX_MODEL_PATH if os.path.exists(ONNX_MODEL_PATH) else TFLITE_MODEL_PATH
 
     @classmethod
     def load_model(cls, model_path):
         """
-        Load and return the TFLite model interpreter.
+        Load and return the model runtime for the given file.
 
         Parameters:
-            model_path (str): Path to the .tflite model file.
+            model_path (str): Path to the .onnx or .tflite model file.
 
         Returns:
-            tf.lite.Interpreter: The loaded and allocated model interpreter.
+            onnxruntime.InferenceSession or tf.lite.Interpreter: The loaded model.
         """
         if cls._model is None:
-            print(f"[MODEL] Loading model from {model_path}")
-            cls._model = tf.lite.Interpreter(model_path=model_path)
-            cls._model.allocate_tensors()
-            print("[MODEL] Model loaded and allocated")
+            with cls._model_lock:
+                # Re-check: another thread may have loaded it while we waited
+                if cls._model is None:
+                    print(f"[MODEL] Loading model from {model_path}")
+                    if model_path.endswith(".onnx"):
+                        import onnxruntime as ort
+
+                        options = ort.SessionOptions()
+                        options.intra_op_num_threads = os.cpu_count() or 1
+                        available = ort.get_available_providers()
+                        providers = [p for p in ("CUDAExecutionProvider", "CPUExecutionProvider") if p in available]
+                        cls._model = ort.InferenceSession(model_path, sess_options=options, providers=providers)
+                    else:
+                        # TensorFlow is only imported when falling back to TFLite
+                        import tensorflow as tf
+
+                        cls._model = tf.lite.Interpreter(model_path=model_path)
+                        cls._model.allocate_tensors()
+                    print("[MODEL] Model loaded and allocated")
         return cls._model
 
+    @classmethod
+    def _invoke(cls, model, audio_input):
+        """
+        Run a single forward pass on either backend.
+
+        Parameters:
+            model: ONNX Runtime session or TFLite interpreter from `load_model()`.
+            audio_input (np.ndarray): Preprocessed audio of shape (1, samples).
+
+        Returns:
+            np.ndarray: Raw logits for the first (only) batch item.
+
+        Raises:
+            ValueError: If the audio shape doesn't match the model input.
+        """
+        if hasattr(model, "get_inputs"):
+            model_input = model.get_inputs()[0]
+            # Dynamic ONNX dims (e.g. batch) are strings/None and match any size
+            expected_shape = tuple(model_input.shape)
+            fixed = [(e, a) for e, a in zip(expected_shape, audio_input.shape) if isinstance(e, int)]
+            if len(expected_shape) != audio_input.ndim or any(e != a for e, a in fixed):
+                raise ValueError(f"[SHAPE ERROR] Expected {expected_shape}, got {audio_input.shape}")
+            return model.run(None, {model_input.name: audio_input})[0][0]
+
+        input_details = model.get_input_details()
+        output_details = model.get_output_details()
+
+        expected_shape = tuple(input_details[0]['shape'])
+        if audio_input.shape != expected_shape:
+            raise ValueError(f"[SHAPE ERROR] Expected {expected_shape}, got {audio_input.shape}")
+
+        model.set_tensor(input_details[0]['index'], audio_input)
+        model.invoke()
+        return model.get_tensor(output_details[0]['index'])[0]
+
     @classmethod
     def load_labels(cls, labels_path):
         """
@@ -71,10 +137,12 @@ class BirdNetRunner:
             List[str]: List of labels, one per line in the file.
         """
         if cls._labels is None:
-            print(f"[LABELS] Loading labels from {labels_path}")
-            with open(labels_path, "r") as f:
-                cls._labels = [line.strip() for line in f.readlines()]
-            print("[LABELS] Labels loaded")
+            with cls._model_lock:
+                if cls._labels is None:
+                    print(f"[LABELS] Loading labels from {labels_path}")
+                    with open(labels_path, "r") as f:
+                        cls._labels = [line.strip() for line in f.readlines()]
+                    print("[LABELS] Labels loaded")
         return cls._labels
 
     @classmethod
@@ -83,7 +151,9 @@ class BirdNetRunner:
         Perform bird species inference on an input audio file.
 
         Parameters:
-            audio_path (str): Path to the .wav or .mp3 audio file.
+            audio_path (str, file-like, or np.ndarray): Path to the .wav or .mp3 audio file,
+                an in-memory buffer readable by soundfile, or audio already preprocessed
+                with `process_audio_file`.
 
         Returns:
             List[Dict[str, Any]]: A list of predictions in the format:
@@ -92,51 +162,49 @@ class BirdNetRunner:
         Raises:
             ValueError: If the preprocessed audio shape doesn't match model input.
         """
-        print(f"[RUNNER] Running inference for {audio_path}")
-
-        # Load and preprocess audio
-        audio, _ = librosa.load(audio_path, sr=SAMPLE_RATE, duration=DURATION)
-        if len(audio) < NUM_SAMPLES:
-            pad_width = NUM_SAMPLES - len(audio)
-            audio = np.pad(audio, (0, pad_width))
+        # Skip building debug strings entirely unless DEBUG logging is on
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        # Load and preprocess audio unless the caller already did
+        if isinstance(audio_path, np.ndarray):
+            if debug:
+                logger.debug(f"[RUNNER] Running inference on preloaded audio {audio_path.shape}")
+            audio_input = audio_path
         else:
-            audio = audio[:NUM_SAMPLES]
+            if debug:
+                logger.debug(f"[RUNNER] Running inference for {audio_path}")
+            audio_input = process_audio_file(audio_path)
 
-        audio_input = np.expand_dims(audio, axis=0).astype(np.float32)
+        model = cls.load_model(cls.default_model_path())
+        labels = cls.load_labels(LABELS_PATH)
 
-        model = cls.load_model("audio_detection/model_files/BirdNET_GLOBAL_6K_V2.4_Model_FP16.tflite")
-        labels = cls.load_labels("audio_detection/model_files/BirdNET_GLOBAL_6K_V2.4_Labels.txt")
+        # Inference (includes shape validation)
+        output_data = cls._invoke(model, audio_input)
 
-        input_details = model.get_input_details()
-        output_details = model.get_output_details()
-
-        # Shape validation
-        expected_shape = tuple(input_details[0]['shape'])
-        if audio_input.shape != expected_shape:
-            raise ValueError(f"[SHAPE ERROR] Expected {expected_shape}, got {audio_input.shape}")
-
-        # Inference
-        model.set_tensor(input_details[0]['index'], audio_input)
-        model.invoke()
-        output_data = model.get_tensor(output_details[0]['index'])[0]
+        if debug:
+            logger.debug(f"[RUNNER] Raw output (first 10): {output_data[:10]}")
 
-        print("[DEBUG] Raw output (first 10):", output_data[:10])
+        # Softmax is monotonic, so select the top 10 on raw logits in O(N)
+        top_indices = np.argpartition(output_data, -10)[-10:]
+        top_indices = top_indices[np.argsort(output_data[top_indices])[::-1]]
 
-        output_data = softmax(output_data)
-        print("[DEBUG] Softmax output (first 10):", output_data[:10])
+        # Softmax only the selected logits; the normalizer still needs one pass
+        max_logit = output_data.max()
+        probs = np.exp(output_data[top_indices] - max_logit)
+        probs /= np.exp(output_data - max_logit).sum()
+        if debug:
+            logger.debug(f"[RUNNER] Top softmax scores: {probs}")
 
-        # Get top predictions
-        top_indices = np.argsort(output_data)[::-1][:10]
         results = []
 
-        for i in top_indices:
-            confidence = float(output_data[i])
+        for i, prob in zip(top_indices, probs):
+            confidence = float(prob)
             label = labels[i]
-            print(f"[INFO] Candidate: {label} -> {confidence:.4f}")
             if confidence > 0.01:
                 results.append({"label": label, "confidence": confidence})
-            else:
-                print(f"[WARN] Skipping low confidence: {label} @ {confidence:.4f}")
+            elif debug:
+                logger.debug(f"[RUNNER] Skipping low confidence: {label} @ {confidence:.4f}")
 
-        print(f"[RUNNER] Top predictions: {results}")
+        if debug:
+            logger.debug(f"[RUNNER] Top predictions: {results}")
         return results
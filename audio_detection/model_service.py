@@ -100,7 +100,9 @@ def run_inference(spectrogram: np.ndarray):
     interpreter.invoke()
 
     output_data = interpreter.get_tensor(output_details[0]['index'])[0]
-    top_indices = np.argsort(output_data)[::-1][:5]
+    # Linear-time top-5 selection, then sort just those 5
+    top_indices = np.argpartition(output_data, -5)[-5:]
+    top_indices = top_indices[np.argsort(output_data[top_indices])[::-1]]
 
     return [{
         "label": labels[i],
@@ -0,0 +1,49 @@
+"""
+export_model.py
+
+One-time export of the YOLO weights (`model.pt`) to a reduced-precision format
+for faster inference. Point `YOLO_MODEL_PATH` at the exported artifact to use it.
+
+Targets:
+- gpu: FP16 TensorRT engine (`model.engine`), requires a CUDA device.
+- cpu: INT8 OpenVINO model (`model_int8_openvino_model/`), for CPU-only Lambda.
+
+Usage:
+    python export_model.py gpu
+    python export_model.py cpu
+"""
+
+import sys
+from ultralytics import YOLO
+
+MODEL_PATH = "./model.pt"
+IMGSZ = 640
+
+
+def export_model(target):
+    """
+    Export the YOLO model for the given target.
+
+    Parameters:
+        target (str): "gpu" for an FP16 TensorRT engine or "cpu" for INT8 OpenVINO.
+
+    Returns:
+        str: Path to the exported model.
+
+    Raises:
+        ValueError: If the target is not recognized.
+    """
+    model = YOLO(MODEL_PATH)
+
+    if target == "gpu":
+        return model.export(format="engine", half=True, imgsz=IMGSZ, device=0)
+    elif target == "cpu":
+        return model.export(format="openvino", int8=True, imgsz=IMGSZ)
+    raise ValueError(f"Unknown export target: {target}")
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "gpu"
+    exported = export_model(target)
+    print(f"[EXPORT] Model exported to {exported}")
+    print(f"[EXPORT] Set YOLO_MODEL_PATH={exported} to use it")
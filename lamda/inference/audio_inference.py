@@ -9,31 +9,36 @@ This module performs:
 - Output schema validation and key normalization
 - Structured error handling for graceful upstream failure reporting
 
-Expects audio files to be valid and readable by `librosa` (e.g., .wav, .mp3).
+Expects audio files to be valid and readable by `soundfile` (e.g., .wav, .flac, .mp3).
 """
 
 import os
+import logging
 import numpy as np
 from audio_detection.model_runner import BirdNetRunner
 
+logger = logging.getLogger(__name__)
+
 def run_audio_detection(audio_path):
     """
     Performs bird sound detection on a given audio file using the BirdNET model.
 
     Parameters:
-        audio_path (str): Path to the input audio file.
+        audio_path (str or file-like): Path to the input audio file, or an
+            in-memory buffer (e.g., io.BytesIO) holding the encoded audio.
 
     Returns:
         List[Dict[str, float]]: List of predictions with "label" and "confidence" fields.
             Format: [{ "label": str, "confidence": float }, ...]
 
     Raises:
-        FileNotFoundError: If the input audio file is not found.
+        FileNotFoundError: If the input audio path is not found.
         Exception: If model inference fails or produces malformed results.
     """
-    print(f"[AUDIO] Processing: {audio_path}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"[AUDIO] Processing: {audio_path}")
 
-    if not os.path.isfile(audio_path):
+    if isinstance(audio_path, str) and not os.path.isfile(audio_path):
         raise FileNotFoundError(f"Audio file does not exist: {audio_path}")
 
     try:
@@ -4,68 +4,83 @@ image_inference.py
 Performs bird detection on a static image using the YOLOv8 object detection model 
 from Ultralytics. Optionally draws bounding boxes on the image and saves the result.
 
-The model is loaded once at cold start for efficiency in environments like 
-Lambda, Docker, or Fargate.
+The model is shared with video inference via `yolo_singleton.get_yolo()` and is
+loaded lazily on first use, for efficiency in environments like Lambda, Docker, or Fargate.
 
 Functions:
 - detect_birds_in_image(): Runs YOLOv8 inference and returns detected birds with metadata.
-
-Environment:
-- Requires a `model.pt` file in the working directory.
 """
 
+import logging
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import os
+from lamda.inference.yolo_singleton import get_yolo, YOLO_IMGSZ
 
-# Load YOLO model once (cold start optimization)
-MODEL_PATH = "./model.pt"
-yolo_model = YOLO(MODEL_PATH)
+logger = logging.getLogger(__name__)
 
 def detect_birds_in_image(image_path, output_path=None, confidence_threshold=0.5):
     """
     Detects birds in an input image using a YOLOv8 model.
 
     Parameters:
-        image_path (str): Path to the input image file.
+        image_path (str or np.ndarray): Path to the input image file, or an
+            already-decoded BGR image (e.g., from cv2.imdecode, which returns None
+            for undecodable bytes).
         output_path (str, optional): If provided, saves the annotated image with bounding boxes.
         confidence_threshold (float): Minimum confidence score to include a detection (default: 0.5).
 
     Returns:
-        List[str]: A list of detected bird labels with confidence scores 
-                   in the format: ["label1 87.50%", "label2 75.34%", ...].
+        List[Dict[str, Any]]: Detections above the threshold in the format:
+            [{ "label": str, "confidence": float, "bbox": [x1, y1, x2, y2] }, ...]
 
     Raises:
-        ValueError: If the image cannot be loaded from the provided path.
+        ValueError: If the image cannot be loaded or decoded.
     """
-    print(f"[IMAGE] Processing: {image_path}")
-
-    # Read image from disk
-    image = cv2.imread(image_path)
+    if logger.isEnabledFor(logging.DEBUG):
+        if isinstance(image_path, np.ndarray):
+            logger.debug(f"[IMAGE] Processing in-memory image: {image_path.shape}")
+        else:
+            logger.debug(f"[IMAGE] Processing: {image_path}")
+
+    # Read image from disk unless it was already decoded in memory
+    # (None means cv2.imdecode already failed on corrupt bytes)
+    if image_path is None or isinstance(image_path, np.ndarray):
+        image = image_path
+    else:
+        image = cv2.imread(image_path)
     if image is None:
         raise ValueError("Image could not be loaded")
 
-    # Run YOLOv8 inference
-    results = yolo_model(image)
+    # Downscale once to the model size so YOLO's letterbox works on far fewer pixels
+    h0, w0 = image.shape[:2]
+    scale = YOLO_IMGSZ / max(h0, w0)
+    if scale < 1:
+        model_input = cv2.resize(image, (round(w0 * scale), round(h0 * scale)), interpolation=cv2.INTER_LINEAR)
+    else:
+        model_input, scale = image, 1.0
+
+    # Run YOLOv8 inference (half precision is ignored on CPU)
+    yolo_model = get_yolo()
+    results = yolo_model(model_input, half=True, verbose=False, imgsz=YOLO_IMGSZ)
     boxes = results[0].boxes
 
-    detections = []
-    labels = []
+    # One device->host copy per tensor, then filter with a single vectorized mask
+    confs = boxes.conf.cpu().numpy()
+    mask = confs >= confidence_threshold
+    confs = confs[mask].tolist()
+    cls_ids = boxes.cls.cpu().numpy()[mask].astype(np.int32).tolist()
+    # Map boxes back to original image coordinates
+    xyxy = (boxes.xyxy.cpu().numpy()[mask] / scale).astype(np.int32).tolist()
 
-    for box in boxes:
-        conf = float(box.conf[0])
-        if conf < confidence_threshold:
-            continue
+    detections = []
 
-        cls_id = int(box.cls[0])
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
+    for (x1, y1, x2, y2), cls_id, conf in zip(xyxy, cls_ids, confs):
         label = yolo_model.names[cls_id]
-        labels.append(f"{label} {conf * 100:.2f}%")
 
         detections.append({
             "label": label,
-            "confidence": round(conf, 2),
+            "confidence": conf,
             "bbox": [x1, y1, x2, y2]
         })
 
@@ -80,4 +95,4 @@ def detect_birds_in_image(image_path, output_path=None, confidence_threshold=0.5
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         cv2.imwrite(output_path, image)
 
-    return labels
+    return detections
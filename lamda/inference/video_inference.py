@@ -4,125 +4,296 @@ video_inference.py
 Runs object detection on video files using the Ultralytics YOLO model 
 and the `supervision` annotation toolkit. Supports:
 - Annotating bounding boxes and class labels per frame
+- Skipping redundant frames via frame striding and an optional scene-change gate
+- Batching analysed frames into a single YOLO forward pass
+- Hardware-accelerated decoding via the FFmpeg backend when available
+- Decoding ahead on a background thread so decode overlaps with inference
 - Tracking object motion with ByteTrack
 - Exporting annotated video to disk (optional)
 
-The model and annotation tools are optimized for runtime reuse,
-and results are returned as aggregated label+confidence strings.
+The model is shared with image inference via `yolo_singleton.get_yolo()`,
+and results are returned as one label+confidence dict per detected class,
+keeping the highest confidence seen across all frames.
 
 Dependencies:
 - cv2 (OpenCV)
 - ultralytics
 - supervision
 - ByteTrack (via supervision)
+
+Environment:
+- OPENCV_FFMPEG_CAPTURE_OPTIONS: Optional FFmpeg decoder options, e.g. "hwaccel;cuda".
 """
 
 import logging
-from ultralytics import YOLO
+from contextlib import closing
+from queue import Queue, Full
+from threading import Thread, Event
 import supervision as sv
 import cv2 as cv
+import numpy as np
 import os
+from lamda.inference.yolo_singleton import get_yolo, YOLO_IMGSZ
 
 # Setup logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-# Load YOLO model once globally to avoid repeated cold starts
-MODEL_PATH = "./model.pt"
-yolo_model = YOLO(MODEL_PATH)
+def open_video_capture(video_path):
+    """
+    Open a video with the FFmpeg backend, requesting any available hardware decoder.
+
+    Falls back to OpenCV's default backend if FFmpeg cannot open the file.
+
+    Parameters:
+        video_path (str): Path to the input video file.
+
+    Returns:
+        cv.VideoCapture: The opened capture (check `isOpened()`).
+    """
+    # Hardware acceleration must be requested at open time; cap.set() afterwards is ignored
+    params = []
+    if hasattr(cv, "CAP_PROP_HW_ACCELERATION"):
+        params = [cv.CAP_PROP_HW_ACCELERATION, cv.VIDEO_ACCELERATION_ANY]
+
+    cap = cv.VideoCapture(video_path, cv.CAP_FFMPEG, params)
+    if not cap.isOpened():
+        cap = cv.VideoCapture(video_path)
+    return cap
+
+# Max decoded frames buffered ahead of inference
+FRAME_QUEUE_SIZE = 8
+
+def iter_frames_prefetched(cap, queue_size=FRAME_QUEUE_SIZE):
+    """
+    Yield frames from an opened capture while a background thread decodes ahead.
+
+    Use with `contextlib.closing` so the decoder thread is stopped and joined
+    before the capture is released, even if the consumer raises.
+
+    Parameters:
+        cap (cv.VideoCapture): An opened video capture.
+        queue_size (int): Maximum number of decoded frames buffered ahead.
+
+    Returns:
+        Generator[np.ndarray]: Decoded BGR frames in order.
+    """
+    frames = Queue(maxsize=queue_size)
+    stop = Event()
+
+    def put(item):
+        # Bounded put that gives up once the consumer has stopped
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret or not put(frame):
+                    break
+        finally:
+            put(None)
 
-def run_video_detection(video_path, result_filename=None, output_path=None, confidence=0.5):
+    producer = Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            frame = frames.get()
+            if frame is None:
+                break
+            yield frame
+    finally:
+        stop.set()
+        producer.join()
+
+# Downsampled grayscale size (width, height) used by the scene-change gate
+MOTION_PROBE_SIZE = (64, 36)
+# Block grid (rows, cols) the probe is split into; must divide the probe evenly
+MOTION_GRID = (4, 8)
+
+def motion_score(cur_small, prev_small):
+    """
+    Measure local change between two probe frames as the largest per-block mean difference.
+
+    A global mean would dilute a small subject (a bird covering ~1% of the frame
+    barely moves it), so the probe is split into a block grid and the busiest block wins.
+
+    Parameters:
+        cur_small (np.ndarray): Current grayscale probe of shape (height, width), uint8.
+        prev_small (np.ndarray): Previous grayscale probe of the same shape.
+
+    Returns:
+        float: Maximum mean absolute difference (0-255) over all blocks.
     """
-    Run bird detection on a video using YOLOv8, with real-time tracking and annotations.
+    rows, cols = MOTION_GRID
+    h, w = cur_small.shape
+    diff = np.abs(cur_small.astype(np.int16) - prev_small)
+    return float(diff.reshape(rows, h // rows, cols, w // cols).mean(axis=(1, 3)).max())
+
+def run_video_detection(video_path, result_filename=None, output_path=None, confidence=0.5,
+                        frame_stride=5, motion_threshold=0, batch_size=16, use_tracking=None):
+    """
+    Run bird detection on a video using YOLOv8, with optional tracking and annotations.
 
     Parameters:
         video_path (str): Path to the input video file.
         result_filename (str, optional): Filename for the annotated output video (e.g., 'result.avi').
         output_path (str, optional): Directory to save the annotated video if result_filename is set.
         confidence (float): Minimum confidence threshold to include detections (default: 0.5).
+        frame_stride (int): Run YOLO on every Nth frame only (default: 5).
+        motion_threshold (float): Largest per-block mean absolute grayscale difference (0-255)
+            against the last analysed frame below which a strided frame is also skipped
+            (see `motion_score()`). 0 disables the gate (default: 0).
+        batch_size (int): Number of analysed frames sent to YOLO in one forward pass (default: 16).
+        use_tracking (bool, optional): Run ByteTrack on detections. Defaults to True only when an
+            annotated video is being saved, since track IDs are not part of the returned results.
 
     Returns:
-        List[str]: A list of detection labels with confidence scores aggregated from all frames.
-            Format: ["label1 91.2%", "label2 84.6%", ...]
+        List[Dict[str, float]]: One entry per detected class with its best confidence across all frames.
+            Format: [{ "label": str, "confidence": float }, ...]
     
     Raises:
         IOError: If the input video cannot be opened.
         Exception: For any unexpected processing failures.
     """
-    collected_labels = []
+    best_confidence = {}
+    yolo_model = get_yolo()
+    debug = logger.isEnabledFor(logging.DEBUG)
+    save_video = bool(result_filename and output_path)
+    if use_tracking is None:
+        use_tracking = save_video
+    cap = out = None
 
     try:
         # Extract video metadata
         video_info = sv.VideoInfo.from_video_path(video_path=video_path)
         w, h, fps = int(video_info.width), int(video_info.height), int(video_info.fps)
 
-        # Configure annotation tools based on video resolution
-        thickness = sv.calculate_optimal_line_thickness(video_info.resolution_wh)
-        text_scale = sv.calculate_optimal_text_scale(video_info.resolution_wh)
+        # Annotation tools are only needed when writing the annotated video
+        if save_video:
+            thickness = sv.calculate_optimal_line_thickness(video_info.resolution_wh)
+            text_scale = sv.calculate_optimal_text_scale(video_info.resolution_wh)
 
-        box_annotator = sv.BoxAnnotator(thickness=thickness, color_lookup=sv.ColorLookup.TRACK)
-        label_annotator = sv.LabelAnnotator(
-            text_scale=text_scale,
-            text_thickness=thickness,
-            text_position=sv.Position.TOP_LEFT,
-            color_lookup=sv.ColorLookup.TRACK
-        )
+            # Colour by track ID when tracking, otherwise by class
+            color_lookup = sv.ColorLookup.TRACK if use_tracking else sv.ColorLookup.CLASS
+            box_annotator = sv.BoxAnnotator(thickness=thickness, color_lookup=color_lookup)
+            label_annotator = sv.LabelAnnotator(
+                text_scale=text_scale,
+                text_thickness=thickness,
+                text_position=sv.Position.TOP_LEFT,
+                color_lookup=color_lookup
+            )
 
-        # Tracker for maintaining object IDs across frames
-        tracker = sv.ByteTrack(frame_rate=fps)
+        # Tracker for maintaining object IDs across frames (only sees strided frames)
+        tracker = sv.ByteTrack(frame_rate=max(1, fps // frame_stride)) if use_tracking else None
         class_dict = yolo_model.names
 
         # Prepare output video writer if saving results
-        if result_filename and output_path:
+        if save_video:
             os.makedirs(output_path, exist_ok=True)
             save_path = os.path.join(output_path, result_filename)
             out = cv.VideoWriter(save_path, cv.VideoWriter_fourcc(*"XVID"), fps, (w, h))
         else:
             out = None
 
-        cap = cv.VideoCapture(video_path)
+        cap = open_video_capture(video_path)
         if not cap.isOpened():
             raise IOError(f"Unable to open video file: {video_path}")
 
         frame_count = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
+        prev_small = None
+        detections = sv.Detections.empty()
+        labels = []
+        pending = []  # (frame_no, frame, analysed) in decode order since the last batch
+        batch = []    # frames queued for the next batched YOLO call
+
+        def flush():
+            """Run YOLO on the queued batch, then track/annotate pending frames in order."""
+            nonlocal detections, labels
+            results = iter(yolo_model(batch, verbose=False, half=True, imgsz=YOLO_IMGSZ) if batch else ())
+
+            for frame_no, frame, analysed in pending:
+                # Skipped frames reuse the last detections for annotation
+                if analysed:
+                    detections = sv.Detections.from_ultralytics(next(results))
+
+                    # Apply tracking (stateful, so strictly in frame order) and confidence filtering
+                    if tracker is not None:
+                        detections = tracker.update_with_detections(detections)
+                    detections = detections[detections.confidence > confidence]
+
+                    # Convert the filtered arrays to Python scalars once, not per element
+                    frame_labels = [class_dict[cls] for cls in detections.class_id.tolist()]
+                    frame_confs = detections.confidence.tolist()
+
+                    # Extract detection labels (only consumed by annotation and debug logging)
+                    if out or debug:
+                        labels = [
+                            f"{label} {conf*100:.1f}%"
+                            for label, conf in zip(frame_labels, frame_confs)
+                        ]
+
+                    if labels and debug:
+                        logger.debug(f"[FRAME {frame_no}] Detections: {labels}")
+
+                    # Keep only the best confidence per class instead of one entry per frame
+                    for label, conf in zip(frame_labels, frame_confs):
+                        if conf > best_confidence.get(label, 0.0):
+                            best_confidence[label] = conf
 
-            frame_count += 1
-            result = yolo_model(frame)[0]
-            detections = sv.Detections.from_ultralytics(result)
+                # Annotate and save frame when writing the output video
+                if out:
+                    box_annotator.annotate(frame, detections=detections)
+                    label_annotator.annotate(frame, detections=detections, labels=labels)
+                    out.write(frame)
 
-            # Apply tracking and confidence filtering
-            detections = tracker.update_with_detections(detections)
-            detections = detections[detections.confidence > confidence]
+            pending.clear()
+            batch.clear()
 
-            # Extract detection labels
-            labels = [
-                f"{class_dict[cls]} {conf*100:.1f}%"
-                for cls, conf in zip(detections.class_id, detections.confidence)
-            ]
+        with closing(iter_frames_prefetched(cap)) as frames:
+            for frame in frames:
+                frame_count += 1
+                if (frame_count - 1) % frame_stride:
+                    process = False
+                elif motion_threshold > 0:
+                    # Scene-change gate: skip YOLO when the frame barely differs from the last analysed one
+                    cur_small = cv.resize(cv.cvtColor(frame, cv.COLOR_BGR2GRAY), MOTION_PROBE_SIZE)
+                    process = (
+                        prev_small is None
+                        or motion_score(cur_small, prev_small) >= motion_threshold
+                    )
+                    if process:
+                        prev_small = cur_small
+                else:
+                    process = True
 
-            if labels:
-                logger.debug(f"[FRAME {frame_count}] Detections: {labels}")
-            collected_labels.extend(labels)
+                # Skipped frames are only buffered when they must be written out
+                if process:
+                    batch.append(frame)
+                    pending.append((frame_count, frame, True))
+                elif out:
+                    pending.append((frame_count, frame, False))
 
-            # Annotate and optionally save frame
-            box_annotator.annotate(frame, detections=detections)
-            label_annotator.annotate(frame, detections=detections, labels=labels)
+                if len(batch) >= batch_size:
+                    flush()
 
-            if out:
-                out.write(frame)
+        flush()
 
     except Exception as e:
         logger.error(f"Video processing failed: {e}")
 
     finally:
         # Release resources
-        cap.release()
+        if cap is not None:
+            cap.release()
         if out:
             out.release()
         logger.info("Video processing complete. Resources released.")
 
-    return collected_labels
+    return [{"label": label, "confidence": conf} for label, conf in best_confidence.items()]
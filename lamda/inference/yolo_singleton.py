@@ -0,0 +1,46 @@
+"""
+yolo_singleton.py
+
+Single shared YOLO model instance for image and video inference.
+
+The model is loaded lazily on the first `get_yolo()` call and cached for the lifetime
+of the container, so both media paths share one copy of the weights and pay the
+load cost only once.
+
+Functions:
+- get_yolo(): Returns the cached YOLO model, loading it on first call.
+
+Environment:
+- YOLO_MODEL_PATH: Model weights to load (default: ./model.pt). Point this at an
+  exported FP16 TensorRT `.engine` or INT8 OpenVINO model (see export_model.py).
+- MODEL_BUCKET / MODEL_KEY: Optionally fetch the weights from S3 into /tmp instead.
+"""
+
+import os
+import threading
+from ultralytics import YOLO
+from lamda.utils.model_cache import resolve_model_path
+
+MODEL_PATH = os.environ.get("YOLO_MODEL_PATH", "./model.pt")
+# Inference image size shared by the image and video paths
+YOLO_IMGSZ = 640
+
+_model = None
+# Concurrent cold-start callers (e.g. FastAPI worker threads) must not load two copies
+_model_lock = threading.Lock()
+
+
+def get_yolo():
+    """
+    Load the YOLO model on first call and reuse it for warm invocations.
+
+    Returns:
+        YOLO: The cached Ultralytics model.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            # Re-check: another thread may have loaded it while we waited
+            if _model is None:
+                _model = YOLO(resolve_model_path(MODEL_PATH))
+    return _model
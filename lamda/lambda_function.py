@@ -10,42 +10,130 @@ Core Tasks:
 - Route to appropriate model runner (BirdNET for audio, YOLO for image/video)
 - Parse and format detection results
 - Write processed results to DynamoDB
-- Archive media file to 'temp/' S3 folder
+- Archive media file to 'temp/' S3 folder (or tag it in place, see ARCHIVE_MODE)
 
 Supports: .mp3, .wav, .flac, .jpg, .jpeg, .png, .mp4, .mov, .avi
 
 AWS Resources:
 - S3 (trigger + storage)
 - DynamoDB (for storing detection results)
+
+Environment:
+- DEBUG_JSON: "1", "true" or "yes" pretty-prints the event, inference results and
+  DynamoDB items as JSON (off by default).
+- ARCHIVE_MODE: "copy" (default) server-side copies the media into 'temp/';
+  "tag" only adds a stage=processed tag to the object in place (lifecycle rules can
+  filter on it to transition or expire the object, but cannot move it to 'temp/').
+
+Inference modules (BirdNET / YOLO stacks) and the S3 client are loaded lazily on
+first use, so a cold start only pays for the media path actually invoked. On
+provisioned-concurrency or SnapStart initialisation the inference modules are
+imported and the YOLO / BirdNET models loaded eagerly instead.
 """
 
 import time
 cold_start_time = time.time()
 
 import json
-import urllib.parse
-import boto3
+import traceback
 import os
-from datetime import datetime
-from decimal import Decimal
+from datetime import datetime, timezone
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 print("[DEBUG] ✅ Core Python modules loaded.")
 
-from lamda.inference.audio_inference import run_audio_detection
-from lamda.inference.image_inference import detect_birds_in_image
-from lamda.inference.video_inference import run_video_detection
 from lamda.utils.db_writer import upload_to_dynamodb
-from lamda.utils.copy_to_temp import copy_media_to_s3_folder
+from lamda.utils.copy_to_temp import copy_media_to_s3_folder, tag_media_processed
+from lamda.utils.aws_clients import get_s3, TRANSFER_CONFIG
 
 print(f"[DEBUG] ✅ Custom modules imported in {time.time() - cold_start_time:.2f} seconds")
 
-s3 = boto3.client("s3")
 TEMP_FILE_PATH = "/tmp/input_media"
+BUCKET_NAME = os.environ.get("BUCKET_NAME", "birdtag-data-bucket")
+_BASE_URL = f"https://{BUCKET_NAME}.s3.amazonaws.com"
+# Pretty-print events/results/DynamoDB items as JSON only when explicitly requested
+DEBUG_JSON = os.environ.get("DEBUG_JSON", "").strip().lower() in ("1", "true", "yes")
+ARCHIVE_MODE = os.environ.get("ARCHIVE_MODE", "copy")
+
+# File extension -> media type
+_MEDIA_BY_EXT = {
+    "mp3": "audio", "wav": "audio", "flac": "audio",
+    "jpg": "image", "jpeg": "image", "png": "image",
+    "mp4": "video", "mov": "video", "avi": "video",
+}
+
+# Inference entrypoints, imported on first use per media type
+_INFER = {}
+
+# Runs the DynamoDB write and the S3 archives side by side (all network-bound)
+_EXEC = ThreadPoolExecutor(max_workers=4)
 
 print("[INFO] Lambda function cold-start initialized.")
 
 
+def get_inference_handler(media_type):
+    """
+    Import and return the inference function for a media type on first use.
+
+    Parameters:
+        media_type (str): "audio", "image", or "video".
+
+    Returns:
+        Callable[[str], list]: Inference function taking a local file path.
+
+    Raises:
+        ValueError: If the media type is not supported.
+    """
+    handler = _INFER.get(media_type)
+    if handler is None:
+        if media_type == "audio":
+            from lamda.inference.audio_inference import run_audio_detection as handler
+        elif media_type == "image":
+            from lamda.inference.image_inference import detect_birds_in_image as handler
+        elif media_type == "video":
+            from lamda.inference.video_inference import run_video_detection as handler
+        else:
+            raise ValueError("Unsupported media type")
+        _INFER[media_type] = handler
+    return handler
+
+
+# Provisioned concurrency / SnapStart containers initialise ahead of traffic with
+# boosted CPU, so import every inference stack and load the weights eagerly there
+# (the model loaders are lazy, so importing alone would leave that to the first request).
+# On-demand stays lazy.
+if os.environ.get("AWS_LAMBDA_INITIALIZATION_TYPE") in ("provisioned-concurrency", "snap-start"):
+    for _media_type in ("audio", "image", "video"):
+        get_inference_handler(_media_type)
+
+    from lamda.inference.yolo_singleton import get_yolo
+    from audio_detection.model_runner import BirdNetRunner
+
+    get_yolo()
+    BirdNetRunner.load_model(BirdNetRunner.default_model_path())
+    print(f"[DEBUG] ✅ Inference modules and models preloaded in {time.time() - cold_start_time:.2f} seconds")
+
+
+def _s3_unquote(key):
+    """
+    Decode an S3 event object key (`+` for spaces, `%XX` escapes).
+
+    Keys without percent-escapes only need `+` replaced, so urllib is imported
+    just for the rare escaped key.
+
+    Parameters:
+        key (str): URL-encoded key from the S3 event record.
+
+    Returns:
+        str: The decoded object key.
+    """
+    if "%" not in key:
+        return key.replace("+", " ")
+    import urllib.parse
+    return urllib.parse.unquote_plus(key)
+
+
 def download_from_s3(bucket, key, local_path=TEMP_FILE_PATH):
     """
     Download a file from S3 to local /tmp directory.
@@ -58,11 +146,37 @@ def download_from_s3(bucket, key, local_path=TEMP_FILE_PATH):
     Returns:
         str: Path to the downloaded local file.
     """
-    s3.download_file(bucket, key, local_path)
+    get_s3().download_file(bucket, key, local_path, Config=TRANSFER_CONFIG)
     print(f"[INFO] Downloaded file to {local_path}")
     return local_path
 
 
+# DynamoDB "N" value used when a result has no confidence
+_DEFAULT_CONF = "-1.0"
+
+
+def _build_entry(source_path, timestamp, file_type, **attributes):
+    """
+    Build the common DynamoDB item shape shared by every entry type.
+
+    Parameters:
+        source_path (str): S3 key of the media file.
+        timestamp (str): ISO UTC timestamp.
+        file_type (str): "audio", "image", or "video".
+        **attributes: Extra AttributeValue fields (e.g. tags, label, confidence).
+
+    Returns:
+        dict: DynamoDB item in AttributeValue format.
+    """
+    return {
+        "source_path": {"S": source_path},
+        "timestamp": {"S": timestamp},
+        "file_type": {"S": file_type},
+        "file_url": {"S": f"{_BASE_URL}/{source_path}"},
+        **attributes,
+    }
+
+
 def generate_dynamodb_entry(source_path, timestamp, media_type, parsed_results):
     """
     Construct a DynamoDB-compatible entry for audio-based predictions.
@@ -77,19 +191,14 @@ def generate_dynamodb_entry(source_path, timestamp, media_type, parsed_results):
         dict: DynamoDB item in AttributeValue format.
     """
     top_result = parsed_results[0] if parsed_results else {}
+    confidence = top_result.get("confidence")
 
-    bucket_name = os.environ.get("BUCKET_NAME", "birdtag-data-bucket")
-    file_url = f"https://{bucket_name}.s3.amazonaws.com/{source_path}"
-
-    return {
-        "source_path": {"S": source_path},
-        "timestamp": {"S": timestamp},
-        "media_type": {"S": media_type},
-        "file_type": {"S": media_type},
-        "file_url": {"S": file_url},
-        "label": {"S": top_result.get("label", "unknown")},
-        "confidence": {"N": str(Decimal(str(top_result.get("confidence", -1.0))))}
-    }
+    return _build_entry(
+        source_path, timestamp, media_type,
+        media_type={"S": media_type},
+        label={"S": top_result.get("label", "unknown")},
+        confidence={"N": _DEFAULT_CONF if confidence is None else str(confidence)},
+    )
 
 
 def generate_video_image_entry(source_path, timestamp, media_type, parsed_results):
@@ -100,77 +209,97 @@ def generate_video_image_entry(source_path, timestamp, media_type, parsed_result
         source_path (str): S3 key of the media file.
         timestamp (str): ISO UTC timestamp.
         media_type (str): "image" or "video".
-        parsed_results (list): List of string labels (e.g., "Bird 93.1%").
+        parsed_results (list): List of dicts with 'label' and 'confidence'.
 
     Returns:
         dict: DynamoDB-formatted item with tag counts.
     """
-    bucket_name = os.environ.get("BUCKET_NAME", "birdtag-data-bucket")
-    file_url = f"https://{bucket_name}.s3.amazonaws.com/{source_path}"
-
-    tag_counts = Counter()
-    for result in parsed_results:
-        label = result.get("label")
-        if label:
-            tag_counts[label] += 1
+    tag_counts = Counter(result["label"] for result in parsed_results if result.get("label"))
 
     tag_map = {label: {"N": str(count)} for label, count in tag_counts.items()}
 
-    return {
-        "source_path": {"S": source_path},
-        "timestamp": {"S": timestamp},
-        "file_type": {"S": media_type},
-        "file_url": {"S": file_url},
-        "tags": {"M": tag_map}
-    }
+    return _build_entry(source_path, timestamp, media_type, tags={"M": tag_map})
 
 
-def save_results(results):
+def build_results_item(results):
     """
-    Unified saver for inference results to DynamoDB.
+    Build the DynamoDB tag-count item for one inference result.
 
     Parameters:
-        results (dict): Dict with keys `source_path`, `media_type`, and `results` (inference output).
+        results (dict): Dict with keys `source_path`, `media_type`, `timestamp`, and `results`
+            (inference output).
+
+    Returns:
+        dict: DynamoDB item in AttributeValue format.
     """
-    try:
-        timestamp = datetime.utcnow().isoformat()
-        source_path = results["source_path"]
-        media_type = results["media_type"]
-        entries = results["results"]
+    timestamp = results["timestamp"]
+    source_path = results["source_path"]
+    media_type = results["media_type"]
+    entries = results["results"]
 
-        # Format results into tag counts
-        tag_counts = Counter()
-        if media_type == "audio":
-            for entry in entries:
-                label = entry.get("label")
-                if label:
-                    tag_counts[label] += 1
-        else:
-            for entry in entries:
-                label, _ = entry.split()
-                tag_counts[label.strip()] += 1
+    # Format results into tag counts in a single pass (all media types return label dicts)
+    tag_counts = Counter(entry["label"] for entry in entries if entry.get("label"))
 
-        tag_map = {label: {"N": str(count)} for label, count in tag_counts.items()}
+    tag_map = {label: {"N": str(count)} for label, count in tag_counts.items()}
 
-        bucket_name = os.environ.get("BUCKET_NAME", "birdtag-data-bucket")
-        file_url = f"https://{bucket_name}.s3.amazonaws.com/{source_path}"
+    return _build_entry(source_path, timestamp, media_type, tags={"M": tag_map})
 
-        item = {
-            "source_path": {"S": source_path},
-            "timestamp": {"S": timestamp},
-            "file_type": {"S": media_type},
-            "file_url": {"S": file_url},
-            "tags": {"M": tag_map}
-        }
 
-        upload_to_dynamodb([item])
+def save_results(results_list):
+    """
+    Unified saver for inference results to DynamoDB.
+
+    All items are written in a single batched upload rather than one call per record.
+
+    Parameters:
+        results_list (list): Dicts with keys `source_path`, `media_type`, `timestamp`, and `results`
+            (inference output).
+    """
+    try:
+        items = [build_results_item(results) for results in results_list]
+
+        upload_to_dynamodb(items)
         print("[INFO] ✅ Saved tags to DynamoDB")
-        print("[DEBUG] DynamoDB entry created:", json.dumps(item, indent=2))
+        if DEBUG_JSON:
+            print("[DEBUG] DynamoDB entries created:")
+            print(json.dumps(items, indent=2))
 
     except Exception as e:
         print(f"[ERROR] Failed to save results: {e}")
 
 
+def archive_media(bucket, key):
+    """
+    Archive a processed media file according to ARCHIVE_MODE.
+
+    Parameters:
+        bucket (str): Bucket holding the media file.
+        key (str): S3 key of the media file.
+    """
+    if ARCHIVE_MODE == "tag":
+        tag_media_processed(bucket, key)
+    else:
+        copy_media_to_s3_folder(bucket, key, dest_folder="temp/")
+
+
+def flush_results(all_results, processed):
+    """
+    Save collected results and archive their media concurrently.
+
+    Parameters:
+        all_results (list): Inference results accepted by `save_results()`.
+        processed (list): (bucket, key) pairs of the media behind those results.
+    """
+    if not all_results:
+        return
+
+    # Independent I/O: finish in max(DynamoDB, S3) rather than their sum
+    futures = [_EXEC.submit(save_results, all_results)]
+    futures += [_EXEC.submit(archive_media, bucket, key) for bucket, key in processed]
+    for future in futures:
+        future.result()
+
+
 def lambda_handler(event, context):
     """
     AWS Lambda entrypoint. Triggered via S3 upload event.
@@ -183,37 +312,33 @@ def lambda_handler(event, context):
         dict: HTTP-like status response.
     """
     handler_start = time.time()
-    print("[INFO] Event Received:", json.dumps(event, indent=2))
-
+    # One timestamp per invocation, shared by every record
+    invocation_ts = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+    if DEBUG_JSON:
+        print("[INFO] Event Received:", json.dumps(event, indent=2))
+    else:
+        print("[INFO] Event Received:", event)
+
+    all_results = []
+    processed = []
     try:
         for record in event["Records"]:
             bucket = record["s3"]["bucket"]["name"]
-            key = urllib.parse.unquote_plus(record["s3"]["object"]["key"])
+            key = _s3_unquote(record["s3"]["object"]["key"])
             print(f"[INFO] File uploaded → Bucket: {bucket}, Key: {key}")
 
             # Determine file type
-            file_ext = key.lower().split(".")[-1]
-            media_type = (
-                "audio" if file_ext in ["mp3", "wav", "flac"]
-                else "image" if file_ext in ["jpg", "jpeg", "png"]
-                else "video" if file_ext in ["mp4", "mov", "avi"]
-                else "unknown"
-            )
+            # Lowercase only the extension, not the whole key
+            file_ext = key[key.rfind(".") + 1:].lower()
+            media_type = _MEDIA_BY_EXT.get(file_ext, "unknown")
 
             print(f"[INFO] Detected media type: {media_type}")
             local_file = download_from_s3(bucket, key)
 
             infer_start = time.time()
 
-            # Route to inference
-            if media_type == "audio":
-                results = run_audio_detection(local_file)
-            elif media_type == "image":
-                results = detect_birds_in_image(local_file, output_path=None)
-            elif media_type == "video":
-                results = run_video_detection(local_file, output_path=None)
-            else:
-                raise ValueError("Unsupported media type")
+            # Route to inference (imports the model stack on first use)
+            results = get_inference_handler(media_type)(local_file)
 
             infer_end = time.time()
             print(f"[DEBUG] Inference for {media_type} took {infer_end - infer_start:.2f} seconds")
@@ -221,23 +346,30 @@ def lambda_handler(event, context):
             final_result = {
                 "media_type": media_type,
                 "source_path": key,
+                "timestamp": invocation_ts,
                 "results": results
             }
 
-            print("[RESULT] Inference Results:")
-            print(json.dumps(final_result, indent=2))
+            if DEBUG_JSON:
+                print("[RESULT] Inference Results:")
+                print(json.dumps(final_result, indent=2))
+            else:
+                print("[RESULT] Inference Results:", final_result)
 
-            save_results(final_result)
+            all_results.append(final_result)
+            processed.append((bucket, key))
 
-        print(f"[DEBUG] Handler completed in {time.time() - handler_start:.2f} seconds")
-        copy_media_to_s3_folder(bucket, key, dest_folder="temp/")
         return {
             "statusCode": 200,
             "body": json.dumps("Inference complete.")
         }
 
     except Exception as e:
-        import traceback
         traceback.print_exc()
         print(f"[DEBUG] Error: {e}")
         return {"statusCode": 500, "body": "Error processing media."}
+
+    finally:
+        # Persist every record that finished, even if a later one failed
+        flush_results(all_results, processed)
+        print(f"[DEBUG] Handler completed in {time.time() - handler_start:.2f} seconds")
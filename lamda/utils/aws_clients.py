@@ -0,0 +1,41 @@
+"""
+aws_clients.py
+
+Shared boto3 clients for the Lambda package. Each client is created on first use and
+reused for the lifetime of the container, so the handler, the temp-folder copy and
+the model download share one signer, endpoint resolver and connection pool.
+
+Functions:
+- get_s3(): Returns the shared S3 client.
+
+Constants:
+- TRANSFER_CONFIG: Shared multipart settings for S3 downloads (parallel ranged GETs).
+"""
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from functools import lru_cache
+
+# Keep-alive connection pool, sized above the transfer concurrency
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={"mode": "standard", "max_attempts": 5},
+)
+
+# Multipart transfer settings: parallel ranged GETs for large media and model weights
+MB = 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * MB,
+    multipart_chunksize=16 * MB,
+    max_concurrency=16,
+    io_chunksize=1 * MB,
+    max_io_queue=10000,
+)
+
+
+@lru_cache(maxsize=None)
+def get_s3():
+    """Create the S3 client on first use and reuse it for the container's lifetime."""
+    return boto3.client("s3", config=S3_CLIENT_CONFIG)
@@ -1,37 +1,38 @@
 import os
-import boto3
+from lamda.utils.aws_clients import get_s3
+
+# File extension -> Content-Type, built once at import
+_CONTENT_TYPE = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".flac": "audio/flac",
+    ".mp4": "video/mp4",
+    ".mov": "video/quicktime",
+    ".avi": "video/x-msvideo"
+}
+_DEFAULT_CONTENT_TYPE = "binary/octet-stream"
 
-s3 = boto3.client("s3")
 
 def copy_media_to_s3_folder(bucket, source_key, dest_folder="temp/"):
+    s3 = get_s3()
     try:
-        # Get original file content
-        response = s3.get_object(Bucket=bucket, Key=source_key)
-        file_bytes = response['Body'].read()
-
         # Extract file extension and name
         filename = os.path.basename(source_key)
         ext = os.path.splitext(filename)[1].lower()
         dest_key = f"{dest_folder}{filename}"
 
         # Infer content type
-        content_type = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".mp3": "audio/mpeg",
-            ".wav": "audio/wav",
-            ".flac": "audio/flac",
-            ".mp4": "video/mp4",
-            ".mov": "video/quicktime",
-            ".avi": "video/x-msvideo"
-        }.get(ext, "binary/octet-stream")
-
-        # Put the object in the new location
-        s3.put_object(
+        content_type = _CONTENT_TYPE.get(ext, _DEFAULT_CONTENT_TYPE)
+
+        # Server-side copy: no object bytes pass through the Lambda
+        s3.copy_object(
             Bucket=bucket,
             Key=dest_key,
-            Body=file_bytes,
+            CopySource={"Bucket": bucket, "Key": source_key},
+            MetadataDirective="REPLACE",
             ContentType=content_type
         )
 
@@ -40,3 +41,25 @@ def copy_media_to_s3_folder(bucket, source_key, dest_folder="temp/"):
 
     except Exception as e:
         print(f"[ERROR] Failed to copy media to {dest_folder}: {e}")
+
+
+def tag_media_processed(bucket, source_key, stage="processed"):
+    # Metadata-only: mark the object in place (e.g. for a lifecycle rule to expire or transition it)
+    s3 = get_s3()
+    try:
+        # put_object_tagging replaces the whole tag set, so keep any existing tags
+        tag_set = s3.get_object_tagging(Bucket=bucket, Key=source_key)["TagSet"]
+        tag_set = [tag for tag in tag_set if tag["Key"] != "stage"]
+        tag_set.append({"Key": "stage", "Value": stage})
+
+        s3.put_object_tagging(
+            Bucket=bucket,
+            Key=source_key,
+            Tagging={"TagSet": tag_set}
+        )
+
+        print(f"[INFO] ✅ Tagged '{source_key}' as stage={stage} in bucket '{bucket}'")
+        return source_key
+
+    except Exception as e:
+        print(f"[ERROR] Failed to tag media as {stage}: {e}")
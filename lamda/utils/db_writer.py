@@ -7,34 +7,59 @@ Supports:
 - Converting float values to Decimal (DynamoDB requirement)
 - Parsing YOLO-style string results (e.g., "Sparrow 92.1%")
 - Building DynamoDB-compatible entries with tag counts and metadata
-- Uploading entries with detailed error handling and logging
+- Uploading entries in BatchWriteItem chunks with retry of unprocessed items
 
 Environment Variables:
 - AWS_REGION: AWS region for the DynamoDB client (default: ap-southeast-2)
 - DETECTION_TABLE_NAME: Name of the DynamoDB table to insert items into
+- DETECTION_TABLE_KEYS: Comma-separated primary key attributes of the table
+  (default: source_path,timestamp). Items sharing these values are collapsed
+  before batching, since BatchWriteItem rejects duplicate keys in one request.
 """
 
 import os
+import time
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from collections import Counter
-from decimal import Decimal
-from datetime import datetime
 
 # Environment configuration
 DYNAMODB_REGION = os.environ.get("AWS_REGION", "ap-southeast-2")
 TABLE_NAME = os.environ.get("DETECTION_TABLE_NAME", "BirdDetections")
 BASE_S3_URL = "https://birdtag-data-bucket.s3.amazonaws.com"
+TABLE_KEY_ATTRIBUTES = tuple(
+    attr.strip() for attr in os.environ.get("DETECTION_TABLE_KEYS", "source_path,timestamp").split(",")
+)
+
+# BatchWriteItem accepts at most 25 put/delete requests per call
+BATCH_WRITE_LIMIT = 25
+MAX_BATCH_RETRIES = 5
+
+# Keep-alive connection pool so warm invocations reuse the TLS session.
+# Standard-mode retries already back off on whole-request throttling errors
+# (ProvisionedThroughputExceeded, Throttling, RequestLimitExceeded), so
+# write_batch() only has to retry UnprocessedItems.
+DYNAMODB_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={"mode": "standard", "max_attempts": 5},
+    connect_timeout=1,
+    read_timeout=3,
+)
 
 # Initialize DynamoDB low-level client
-dynamodb_client = boto3.client("dynamodb", region_name=DYNAMODB_REGION)
+dynamodb_client = boto3.client("dynamodb", region_name=DYNAMODB_REGION, config=DYNAMODB_CLIENT_CONFIG)
 
 
 def convert_floats_to_decimal(obj):
     """
-    Recursively convert all float values in a nested structure to Decimal.
+    Convert all float values in a nested structure to Decimal, in place.
 
     Required for compatibility with DynamoDB, which does not accept Python floats.
+    Walks dicts and lists with an explicit stack (no recursion) and rewrites only
+    the float slots (including float subclasses such as np.float64), so containers
+    without floats are left untouched.
 
     Parameters:
         obj (Any): A dict, list, or float-containing structure.
@@ -42,12 +67,30 @@ def convert_floats_to_decimal(obj):
     Returns:
         Any: The same structure with all floats converted to Decimal.
     """
-    if isinstance(obj, list):
-        return [convert_floats_to_decimal(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: convert_floats_to_decimal(v) for k, v in obj.items()}
-    elif isinstance(obj, float):
-        return Decimal(str(obj))
+    # decimal is only needed here, and the Lambda write path never calls this
+    from decimal import Decimal
+
+    if isinstance(obj, float):
+        return Decimal(str(float(obj)))
+
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if type(current) is dict:
+            slots = current.items()
+        elif type(current) is list:
+            slots = enumerate(current)
+        else:
+            continue
+
+        for key, value in slots:
+            value_type = type(value)
+            if value_type is dict or value_type is list:
+                stack.append(value)
+            # Fast exact check first; isinstance catches float subclasses such as np.float64
+            elif value_type is float or isinstance(value, float):
+                # Replacing a value under an existing key/index is safe during iteration
+                current[key] = Decimal(str(float(value)))
     return obj
 
 
@@ -105,9 +148,76 @@ def generate_dynamodb_entry(source_path, timestamp, media_type, results, base_ur
     }
 
 
+def chunked(items, size):
+    """
+    Yield successive slices of `items` with at most `size` elements each.
+
+    Parameters:
+        items (list): Sequence to split.
+        size (int): Maximum slice length.
+
+    Returns:
+        Generator[list]: Consecutive slices of the input list.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def write_batch(chunk):
+    """
+    Write one BatchWriteItem chunk, re-enqueuing unprocessed items.
+
+    `UnprocessedItems` are retried with exponential backoff (50ms doubling, capped
+    at 1s). Whole-request throttling is retried by the client's standard retry
+    mode; client errors that outlast it propagate.
+
+    Parameters:
+        chunk (List[dict]): Up to 25 DynamoDB-formatted items.
+
+    Returns:
+        int: Number of items still unprocessed after all retries.
+    """
+    request_items = {TABLE_NAME: [{"PutRequest": {"Item": item}} for item in chunk]}
+
+    for attempt in range(MAX_BATCH_RETRIES + 1):
+        response = dynamodb_client.batch_write_item(RequestItems=request_items)
+        request_items = response.get("UnprocessedItems") or {}
+
+        if not request_items or attempt == MAX_BATCH_RETRIES:
+            break
+        time.sleep(min(0.05 * (2 ** attempt), 1.0))
+
+    return len(request_items.get(TABLE_NAME, []))
+
+
+def dedupe_by_key(items):
+    """
+    Collapse items that share a primary key, keeping the last one.
+
+    BatchWriteItem fails the whole request with a ValidationException when two
+    items in it have the same key; the last-wins rule matches what sequential
+    PutItem calls would have left in the table.
+
+    Parameters:
+        items (List[dict]): DynamoDB-formatted items.
+
+    Returns:
+        List[dict]: Items with unique `TABLE_KEY_ATTRIBUTES` values.
+    """
+    by_key = {}
+    for item in items:
+        key = tuple(repr(item.get(attr)) for attr in TABLE_KEY_ATTRIBUTES)
+        by_key[key] = item
+    return list(by_key.values())
+
+
 def upload_to_dynamodb(entries):
     """
-    Upload a list of items to DynamoDB using the low-level Boto3 client.
+    Upload a list of items to DynamoDB using BatchWriteItem.
+
+    Items are validated and de-duplicated by primary key up front, then sent in
+    chunks of 25 (the BatchWriteItem limit) via `write_batch()`, which handles
+    throttling and `UnprocessedItems`.
 
     Parameters:
         entries (List[dict]): List of DynamoDB-formatted items to upload.
@@ -119,20 +229,29 @@ def upload_to_dynamodb(entries):
         print("[WARN] No entries to upload.")
         return
 
+    # Pre-validate so malformed items never reach (and fail) a whole batch
+    items = [item for item in entries if isinstance(item, dict) and "source_path" in item]
+    if len(items) != len(entries):
+        print(f"[WARN] Skipping {len(entries) - len(items)} malformed entries.")
+
+    unique_items = dedupe_by_key(items)
+    if len(unique_items) != len(items):
+        print(f"[WARN] Collapsed {len(items) - len(unique_items)} entries sharing a primary key.")
+    items = unique_items
+
     success_count = 0
 
-    for item in entries:
+    for chunk in chunked(items, BATCH_WRITE_LIMIT):
         try:
-            dynamodb_client.put_item(
-                TableName=TABLE_NAME,
-                Item=item
-            )
-            success_count += 1
+            unprocessed = write_batch(chunk)
+            success_count += len(chunk) - unprocessed
+            if unprocessed:
+                print(f"[ERROR] {unprocessed} items left unprocessed after {MAX_BATCH_RETRIES} retries")
         except ClientError as e:
             print(f"[ERROR] DynamoDB ClientError → {e.response['Error']['Message']}")
-            print(f"[DEBUG] Failed item → {item}")
+            print(f"[DEBUG] Failed batch of {len(chunk)} items")
         except Exception as e:
             print(f"[ERROR] Unexpected error → {str(e)}")
-            print(f"[DEBUG] Failed item → {item}")
+            print(f"[DEBUG] Failed batch of {len(chunk)} items")
 
     print(f"[INFO] Successfully uploaded {success_count}/{len(entries)} entries to DynamoDB.")
@@ -0,0 +1,51 @@
+"""
+model_cache.py
+
+Resolves where the YOLO weights are loaded from. When `MODEL_BUCKET` and `MODEL_KEY`
+are set, the weights are pulled from S3 into /tmp once per container (multipart,
+parallel ranged GETs) and reused by every warm invocation. Otherwise the bundled
+local file is used unchanged.
+
+This keeps large weights out of the deployment package and allows swapping in an
+exported FP16/INT8 model without a redeploy.
+
+Environment Variables:
+- MODEL_BUCKET: S3 bucket holding the model weights (optional)
+- MODEL_KEY: S3 key of the model weights, e.g. "models/model.engine" (optional)
+"""
+
+import os
+import threading
+from lamda.utils.aws_clients import get_s3, TRANSFER_CONFIG
+
+MODEL_BUCKET = os.environ.get("MODEL_BUCKET")
+MODEL_KEY = os.environ.get("MODEL_KEY")
+MODEL_CACHE_DIR = "/tmp"
+# Serialises the download so concurrent callers never share one .part file
+_download_lock = threading.Lock()
+
+
+def resolve_model_path(default_path):
+    """
+    Return a local path to the model weights, downloading them from S3 on first use.
+
+    Parameters:
+        default_path (str): Bundled weights used when no S3 location is configured.
+
+    Returns:
+        str: Local path to load the model from.
+    """
+    if not (MODEL_BUCKET and MODEL_KEY):
+        return default_path
+
+    local_path = os.path.join(MODEL_CACHE_DIR, os.path.basename(MODEL_KEY))
+    if not os.path.exists(local_path):
+        with _download_lock:
+            # Re-check: another thread may have finished the download while we waited
+            if not os.path.exists(local_path):
+                print(f"[MODEL] Downloading s3://{MODEL_BUCKET}/{MODEL_KEY} to {local_path}")
+                # Download to a temp name so a failed transfer never leaves a partial model behind
+                partial_path = f"{local_path}.part"
+                get_s3().download_file(MODEL_BUCKET, MODEL_KEY, partial_path, Config=TRANSFER_CONFIG)
+                os.replace(partial_path, local_path)
+    return local_path